@@ -1,30 +1,62 @@
+import bottleneck as bn
 import numpy as np
 import pandas as pd
 import scipy.stats as stats
 import yfinance as yf
 import plotly.graph_objects as go
 import plotly.express as px
+from plotly.subplots import make_subplots
 import datetime as dt
 import streamlit as st
+from tsdownsample import MinMaxLTTBDownsampler
 import calendar
+from numba import njit
+import hashlib
+import os
+import re
+import tempfile
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+# Downsampler for long line traces (stateless, so one instance is shared)
+# Bounded traces (drawdown %, underwater months, annual/seasonal %) are handed to Plotly as float32 to halve the payload;
+# prices stay float64 since float32 is coarser than a cent above 2**17
+_DOWNSAMPLER = MinMaxLTTBDownsampler()
+
+# Layout and style settings shared by every chart; each plot only adds its own titles
+_FIXED_AXES = dict(xaxis_fixedrange=True, yaxis_fixedrange=True)
+_LAYOUT = dict(template="plotly_white", xaxis_title="Date", **_FIXED_AXES)
+_LINE_YELLOW = dict(color='#ffde59')
+_LINE_RED = dict(color='red')
+_ZERO_LINE = dict(color="black", dash="dash")
+
+# Cache keys for the figure builders: a series is identified by its span, length, last value and sum
+# rather than by hashing every element (the builders share _compute_all's TTL and entry bound)
+_FIGURE_HASH_FUNCS = {
+    pd.Series: lambda s: (s.index[0], s.index[-1], len(s), float(s.iloc[-1]), float(s.sum())),
+    pd.DatetimeIndex: lambda i: (i[0], i[-1], len(i)),
+}
+
+# Ticker syntax: letters, digits and the ^ = . - used by indices, futures, FX and share classes
+_VALID_TICKER = re.compile(r"[A-Z0-9^=.\-]+")
+_TICKER_SEPARATOR = re.compile(r"\s*,\s*")
 
 def process_ticker_input(input_text):
     try:
         # Convert to string and strip whitespace
         input_text = str(input_text).strip()
 
-        # Check for commas (multiple tickers)
-        if "," in input_text:
-            # Split by commas, clean, and convert to uppercase
-            tickers = [ticker.strip().upper() for ticker in input_text.split(",")]
-        else:
-            # Single ticker, ensure uppercase
-            tickers = [input_text.upper()]
+        # Split by commas (multiple tickers), dropping the whitespace around them, and convert to uppercase
+        tickers = _TICKER_SEPARATOR.split(input_text.upper())
 
-        # Validate tickers (optional: ensure valid characters)
+        # Validate tickers (optional: ensure valid characters), skipping blanks and repeats so each is analysed once
         valid_tickers = []
+        seen = set()
         for ticker in tickers:
-            if all(char.isalnum() or char in {"^", "=", ".", "-"} for char in ticker):
+            if not ticker or ticker in seen:
+                continue
+            seen.add(ticker)
+            if _VALID_TICKER.fullmatch(ticker):
                 valid_tickers.append(ticker)
             else:
                 st.warning(f"Invalid ticker format: {ticker}")
@@ -34,99 +66,303 @@ def process_ticker_input(input_text):
     except Exception as e:
         st.error(f"An error occurred while processing tickers: {e}")
         return []
-        
+
+# Raised when requested tickers come back empty: st.cache_data does not memoise exceptions, so a failed or
+# rate-limited download is retried on the next run instead of being cached as "no data"
+class _NoDataError(Exception):
+    def __init__(self, missing, results):
+        super().__init__(f"No data found for {', '.join(missing)}")
+        self.missing = missing
+        self.results = results
+
+# Function to read a cached price file; an unreadable (e.g. truncated) file is removed and treated as a miss
+def _read_cached(path):
+    try:
+        return pd.read_parquet(path)['Close']
+    except Exception:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+# Function to fetch closing prices for a set of tickers, memoised for an hour and backed by per-ticker parquet files
+# (closed ranges are served from disk; the short TTL keeps ranges reaching today fresh)
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_closes(tickers, start, end):
+    closes = {}
+    paths = {}
+    for ticker in tickers:
+        key = hashlib.md5(f"{ticker}_{start}_{end}".encode()).hexdigest()
+        paths[ticker] = os.path.join(CACHE_DIR, f"{key}.parquet")
+        if os.path.exists(paths[ticker]):
+            cached = _read_cached(paths[ticker])
+            if cached is not None:
+                closes[ticker] = cached
+
+    missing = [ticker for ticker in tickers if ticker not in closes]
+    if missing:
+        # One batched request for everything not on disk; yfinance splits it into threaded chunks itself
+        prices = yf.download(missing, start=start, end=end, progress=False, group_by='ticker', auto_adjust=True, threads=True)
+        if not isinstance(prices.columns, pd.MultiIndex):
+            # Older yfinance returns flat columns for a single ticker
+            prices = pd.concat({missing[0]: prices}, axis=1)
+        downloaded = set(prices.columns.get_level_values(0))
+
+        for ticker in missing:
+            if ticker not in downloaded:
+                continue
+            stock_prices = prices[ticker]['Close'].dropna()
+            if stock_prices.empty:
+                continue
+            closes[ticker] = stock_prices
+
+            # Only persist closed date ranges; a range reaching today is still filling in
+            if end < dt.date.today():
+                # Written to a temp file and renamed into place, so a killed run or full disk never leaves
+                # a partial file behind and concurrent sessions only ever see complete ones
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+                os.close(fd)
+                try:
+                    stock_prices.to_frame('Close').to_parquet(tmp_path)
+                    os.replace(tmp_path, paths[ticker])
+                except OSError:
+                    os.remove(tmp_path)
+
+    empty = tuple(ticker for ticker in tickers if ticker not in closes)
+    if empty:
+        raise _NoDataError(empty, closes)
+    return closes
+
+# Function to compute returns, CAGR, volatility, drawdown, max-drawdown trough, recovery and underwater duration in one pass
+# over the prices and their (full-history or lookback-window) peaks
+# (fastmath without the no-NaN assumption, so missing closes are still skipped by the volatility accumulator)
+@njit(cache=True, fastmath={"nsz", "arcp", "contract", "afn", "reassoc"})
+def _metrics(prices, peaks, years):
+    n = len(prices)
+    returns = np.empty(n)
+    dd = np.empty(n)
+    underwater = np.empty(n)
+    cagr = (prices[-1] / prices[0]) ** (1 / years) - 1
+
+    # Welford accumulators for the variance of daily returns
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+
+    trough = 0
+    trough_peak = peaks[0]  # Peak preceding the deepest drawdown
+    recovery = -1  # First index back at trough_peak, -1 while still underwater
+    days_underwater = 0
+    returns[0] = np.nan
+    for i in range(n):
+        price = prices[i]
+        if i > 0:
+            r = price / prices[i - 1] - 1.0
+            returns[i] = r
+            if r == r:
+                count += 1
+                delta = r - mean
+                mean += delta / count
+                m2 += delta * (r - mean)
+
+        dd[i] = price / peaks[i] - 1.0
+
+        if dd[i] < dd[trough]:
+            trough = i
+            trough_peak = peaks[i]
+            recovery = -1
+        if recovery < 0 and price >= trough_peak:
+            recovery = i
+
+        if dd[i] < 0:
+            days_underwater += 1
+        else:
+            days_underwater = 0
+        underwater[i] = days_underwater / 30.0
+
+    volatility = np.sqrt(m2 / (count - 1)) * np.sqrt(252) if count > 1 else np.nan
+    return returns, cagr, volatility, dd, trough, recovery, underwater
+
+# Function to sum daily returns per calendar year with np.bincount (only years holding data are returned)
+def _annual_returns(index, returns):
+    valid = ~np.isnan(returns)
+    years = index.year.to_numpy() - index[0].year
+    sums = np.bincount(years[valid], weights=returns[valid], minlength=years[-1] + 1)
+    present = np.bincount(years, minlength=years[-1] + 1) > 0
+    return np.arange(index[0].year, index[-1].year + 1)[present], sums[present]
+
+# Function to average the monthly returns of each calendar month with np.bincount (months with no data stay at 0)
+def _monthly_avg(index, returns):
+    valid = ~np.isnan(returns)
+    months = index.month.to_numpy() - 1
+    sums = np.bincount(months[valid], weights=returns[valid], minlength=12)
+    # Every (year, month) from the first bar to the last counts once, so months without bars average in as 0
+    codes = index.year.to_numpy() * 12 + months
+    counts = np.bincount(np.arange(codes[0], codes[-1] + 1) % 12, minlength=12)
+    return np.divide(sums, counts, out=np.zeros(12), where=counts != 0)
+
+# Function to compute the backtest metrics of a single ticker (no Streamlit calls)
+def _compute_ticker(ticker, stock_prices, years, lookback):
+    prices = np.ascontiguousarray(stock_prices.to_numpy(dtype=np.float64))
+    index = stock_prices.index
+
+    # Peaks to measure drawdown from: the trailing lookback window, or the whole history when it covers it
+    if lookback < len(prices):
+        peaks = bn.move_max(prices, window=lookback, min_count=1)
+    else:
+        peaks = np.maximum.accumulate(prices)
+
+    # Returns, CAGR, Volatility, Drawdown, Recovery and Underwater Duration in a single compiled pass
+    returns, cagr, annual_volatility, dd, trough, recovery, underwater_y = _metrics(prices, peaks, years)
+    drawdown = pd.Series(dd, index=index)
+    max_drawdown = dd[trough]
+    max_drawdown_start = index[trough]  # Date of max drawdown
+
+    # Calculate recovery period
+    recovery_period = None
+    if recovery >= 0:
+        recovery_period = (index[recovery] - max_drawdown_start).days
+
+    # Calendar Year Returns and Seasonality straight from the daily returns
+    return_years, annual_returns = _annual_returns(index, returns)
+    monthly_avg = _monthly_avg(index, returns)
+
+    return {
+        'prices': stock_prices,
+        'drawdown': drawdown,
+        'underwater_y': underwater_y,
+        'years': return_years,
+        'annual': annual_returns,
+        'monthly_avg': monthly_avg,
+        'cagr': cagr,
+        'vol': annual_volatility,
+        'mdd': max_drawdown,
+        'recovery': recovery_period,
+    }
+
+# Function to fetch and analyse every ticker; cached so identical reruns skip the whole pipeline
+# (same TTL as the price fetch so ranges reaching today refresh, and bounded since every lookback is its own entry)
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def _compute_all(tickers, start, end, lookback):
+    try:
+        stock_data = _fetch_closes(tickers, start, end)
+        missing = ()
+    except _NoDataError as e:
+        stock_data, missing = e.results, e.missing
+
+    computed = dict.fromkeys(tickers)
+
+    # Calculate years
+    difference = end - start
+    years = difference.total_seconds() / (365.25 * 24 * 3600)
+
+    # The compiled kernel takes about a millisecond per ticker, so this runs serially
+    # (a process pool's startup and pickling cost more than it saves)
+    for ticker, stock_prices in stock_data.items():
+        computed[ticker] = _compute_ticker(ticker, stock_prices, years, lookback)
+
+    # Tickers without data are raised rather than returned, so this run is not memoised and the next one retries
+    if missing:
+        raise _NoDataError(missing, computed)
+    return computed
+
+# Function to pick which points of a long line series to plot (MinMax-preselected Largest-Triangle-Three-Buckets)
+def _lttb(x, y, n_out=2000):
+    if len(x) <= n_out:
+        return np.arange(len(x))
+    return _DOWNSAMPLER.downsample(x, np.asarray(y, dtype=np.float64), n_out=n_out)
+
+# Function to build the price chart
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False, hash_funcs=_FIGURE_HASH_FUNCS)
+def _build_price_fig(ticker, stock_prices):
+    keep = _lttb(stock_prices.index.asi8, stock_prices.values)
+    fig = go.Figure(
+        data=[go.Scattergl(x=stock_prices.index[keep], y=stock_prices.values[keep], mode='lines', name='Price', line=_LINE_YELLOW, hovertemplate="$%{y:.2f}")],
+        layout=go.Layout(**(_LAYOUT | {"title": f"{ticker} Price Chart", "yaxis_title": "Price ($)"}))
+    )
+    return fig
+
 # Function to plot the price chart
 def plot_price_chart(ticker, stock_prices):
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=stock_prices.index, y=stock_prices, mode='lines', name='Price', line=dict(color='#ffde59'), hovertemplate="$%{y:.2f}"))
-    fig.update_layout(
-        title=f"{ticker} Price Chart",
-        xaxis_title="Date",
-        yaxis_title="Price ($)",
-        template="plotly_white"
-    )
-    fig.layout.xaxis.fixedrange = True
-    fig.layout.yaxis.fixedrange = True
-    st.plotly_chart(fig)
+    st.plotly_chart(_build_price_fig(ticker, stock_prices))
 
-# Function to plot drawdown and underwater periods
-def plot_drawdown_and_underwater(ticker, drawdown, underwater_x, underwater_y):
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=drawdown.index,
-        y=drawdown * 100,
+# Function to build the drawdown and underwater periods chart (one figure, shared date axis)
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False, hash_funcs=_FIGURE_HASH_FUNCS)
+def _build_drawdown_fig(ticker, drawdown, underwater_x, underwater_y):
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.08,
+                        subplot_titles=(f"{ticker} Drawdown", f"{ticker} Underwater Period Duration"))
+
+    keep = _lttb(drawdown.index.asi8, drawdown.values)
+    fig.add_trace(go.Scattergl(
+        x=drawdown.index[keep],
+        y=(drawdown.values[keep] * 100).astype(np.float32),
         mode='lines',
         fill='tozeroy',
         fillcolor='pink',
         name='Drawdown',
-        line=dict(color='red'),
+        line=_LINE_RED,
         hovertemplate="Date: %{x|%Y-%m-%d}<br>Drawdown: %{y:.2f}%"
-    ))
-    fig.update_layout(
-        title=f"{ticker} Drawdown",
-        xaxis_title="Date",
-        yaxis_title="Drawdown (%)",
-        template="plotly_white"
-    )
-    fig.layout.xaxis.fixedrange = True
-    fig.layout.yaxis.fixedrange = True
-    st.plotly_chart(fig)
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=underwater_x,
-        y=underwater_y,
+    ), row=1, col=1)
+
+    keep = _lttb(underwater_x.asi8, underwater_y)
+    fig.add_trace(go.Scattergl(
+        x=underwater_x[keep],
+        y=underwater_y[keep].astype(np.float32),
         mode='lines',
         name='Underwater Duration',
-        line=dict(color='#ffde59'),
-        hovertemplate="Date: %{x|%Y-%m-%d}<br>Duration: %{y:.1f} Months"))
+        line=_LINE_YELLOW,
+        hovertemplate="Date: %{x|%Y-%m-%d}<br>Duration: %{y:.1f} Months"), row=2, col=1)
+
     fig.update_layout(
-        title=f"{ticker} Underwater Period Duration",
-        xaxis_title="Date",
-        yaxis_title="Duration (Months)",
-        template="plotly_white"
+        template=_LAYOUT["template"],
+        height=800,
+        showlegend=False,
+        xaxis2_title="Date",
+        yaxis_title="Drawdown (%)",
+        yaxis2_title="Duration (Months)",
+        xaxis2_fixedrange=True,
+        yaxis2_fixedrange=True,
+        **_FIXED_AXES
     )
-    fig.layout.xaxis.fixedrange = True
-    fig.layout.yaxis.fixedrange = True
-    st.plotly_chart(fig)
-# Function to plot annual returns chart
-def plot_annual_returns(ticker, annual_return, bin_size = 10):
-    annual_return_percentage = annual_return * 100
-    years = annual_return.index.year
-    values = annual_return_percentage.values
+    return fig
+
+# Function to plot drawdown and underwater periods
+def plot_drawdown_and_underwater(ticker, drawdown, underwater_x, underwater_y):
+    st.plotly_chart(_build_drawdown_fig(ticker, drawdown, underwater_x, underwater_y))
+
+# Function to build the annual returns bar chart and distribution histogram
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False, hash_funcs=_FIGURE_HASH_FUNCS)
+def _build_annual_returns_figs(ticker, years, annual_return, bin_size):
+    values = annual_return * 100
 
+    # Every calendar year in the span gets a bar; years without data stay at 0
     full_years = np.arange(years.min(), years.max() + 1)
-    return_dict = dict(zip(years, values))
-    all_values = [return_dict.get(year, 0) for year in full_years]
-
-    fig = go.Figure()
-    fig.add_trace(go.Bar(
-        x=full_years,
-        y=all_values,
-        name=f'{ticker}',
-        marker=dict(color=["red" if v <= 0 else "green" for v in all_values]),
-                    hovertemplate="Year: %{x}<br>Annual Return: %{y:.2f}%"
-    ))
-    fig.add_hline(y=0, line=dict(color="black", dash="dash"))
-    fig.update_layout(
-        title=f"{ticker} Annual Returns by Calendar Year",
-        xaxis_title="Year",
-        yaxis_title="Annual Returns (%)",
-        template="plotly_white"
+    all_values = np.zeros(full_years.size)
+    all_values[years - years.min()] = values
+
+    bar_fig = go.Figure(
+        data=[go.Bar(
+            x=full_years,
+            y=all_values.astype(np.float32),
+            name=f'{ticker}',
+            marker_color=np.where(all_values <= 0, "red", "green"),
+                        hovertemplate="Year: %{x}<br>Annual Return: %{y:.2f}%"
+        )],
+        layout=go.Layout(**(_LAYOUT | {"title": f"{ticker} Annual Returns by Calendar Year", "xaxis_title": "Year", "yaxis_title": "Annual Returns (%)"}))
     )
-    fig.layout.xaxis.fixedrange = True
-    fig.layout.yaxis.fixedrange = True
-    st.plotly_chart(fig)
-    
-    positive_returns = [v for v in values if v > 0]
-    negative_returns = [v for v in values if v < 0]
+    bar_fig.add_hline(y=0, line=_ZERO_LINE)
 
-    fig = go.Figure()
+    positive_returns = values[values > 0]
+    negative_returns = values[values < 0]
+
+    traces = []
 
     # Add positive returns histogram
-    if positive_returns:
-        fig.add_trace(go.Histogram(
-            x=positive_returns,
+    if positive_returns.size:
+        traces.append(go.Histogram(
+            x=positive_returns.astype(np.float32),
             marker=dict(color="green"),
             xbins=dict(
                 size=bin_size  # Set bin size
@@ -136,9 +372,9 @@ def plot_annual_returns(ticker, annual_return, bin_size = 10):
         ))
 
     # Add negative returns histogram
-    if negative_returns:
-        fig.add_trace(go.Histogram(
-            x=negative_returns,
+    if negative_returns.size:
+        traces.append(go.Histogram(
+            x=negative_returns.astype(np.float32),
             marker=dict(color="red"),
             xbins=dict(
                 size=bin_size  # Set bin size
@@ -147,37 +383,46 @@ def plot_annual_returns(ticker, annual_return, bin_size = 10):
             hovertemplate="Count: %{y}"
         ))
 
-    fig.update_traces(marker_line_width=0)
-    fig.update_layout(
-        barmode='overlay',
-        title=f"{ticker} Annual Returns Distribution",
-        xaxis_title="Annual Return (%)",
-        yaxis_title="Frequency",
-        bargap=0.2,  # Add spacing between bars
-        template="plotly_white",
-        showlegend=False  # Remove legend
+    hist_fig = go.Figure(
+        data=traces,
+        layout=go.Layout(**(_LAYOUT | {
+            "barmode": 'overlay',
+            "title": f"{ticker} Annual Returns Distribution",
+            "xaxis_title": "Annual Return (%)",
+            "yaxis_title": "Frequency",
+            "bargap": 0.2,  # Add spacing between bars
+            "showlegend": False  # Remove legend
+        }))
     )
-    fig.layout.xaxis.fixedrange = True
-    fig.layout.yaxis.fixedrange = True
-    st.plotly_chart(fig)
-# Function to plot seasonality histogram
-def plot_seasonality_and_table(ticker, monthly_returns):
-    monthly_avg = monthly_returns.groupby(monthly_returns.index.month).mean()
+    hist_fig.update_traces(marker_line_width=0)
+    return bar_fig, hist_fig
+
+# Function to plot annual returns chart
+def plot_annual_returns(ticker, years, annual_return, bin_size = 10):
+    bar_fig, hist_fig = _build_annual_returns_figs(ticker, years, annual_return, bin_size)
+    st.plotly_chart(bar_fig)
+    st.plotly_chart(hist_fig)
+
+# Function to build the seasonality chart
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False, hash_funcs=_FIGURE_HASH_FUNCS)
+def _build_seasonality_fig(ticker, monthly_avg_filled):
     months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-    monthly_avg_filled = monthly_avg.reindex(range(1, 13)).fillna(0)
 
     fig = px.bar(
         x=months,
-        y=monthly_avg_filled.values * 100,
+        y=(monthly_avg_filled * 100).astype(np.float32),
         labels={'x': 'Month', 'y': 'Monthly Average Return (%)'},
         title=f"{ticker} Seasonality Analysis",
-        template="plotly_white"
+        template=_LAYOUT["template"]
     )
-    fig.update_traces(marker=dict(color=["green" if val > 0 else "red" for val in monthly_avg_filled]),
+    fig.update_traces(marker_color=np.where(monthly_avg_filled > 0, "green", "red"),
                       hovertemplate="Month: %{x}<br>Monthly Return: %{y:.2f}%")
-    fig.layout.xaxis.fixedrange = True
-    fig.layout.yaxis.fixedrange = True
-    st.plotly_chart(fig)
+    fig.update_layout(**_FIXED_AXES)
+    return fig
+
+# Function to plot seasonality histogram
+def plot_seasonality_and_table(ticker, monthly_avg_filled):
+    st.plotly_chart(_build_seasonality_fig(ticker, monthly_avg_filled))
 # Main Streamlit App
 def main():
     st.title("Asset Analysis By Isara Wealth")
@@ -213,6 +458,10 @@ def main():
     last_day = calendar.monthrange(selected_end_year, end_month_number)[1]  # Get the last day of the selected month
     end_date = dt.date(selected_end_year, end_month_number, last_day)
 
+    # Drawdown lookback window; the maximum spans every year on offer, i.e. the full history
+    max_lookback = 252 * (dt.date.today().year - 1990 + 1)
+    lookback = st.slider("Drawdown lookback (trading days):", min_value=21, max_value=max_lookback, value=max_lookback)
+
     # User inputs
     # tickers = st.text_input("Enter ticker symbol:", "SPY")
     # start_date = st.date_input("Start date:", dt.date.today() - dt.timedelta(days=365 * 20))
@@ -227,88 +476,47 @@ def main():
                 st.error("No valid tickers provided.")
                 return
 
-            for ticker in tickers:
-                stock_prices = yf.Ticker(ticker).history(start=start_date, end=end_date)['Close']
+            # Reserve one slot per ticker up front so the page layout is fixed while the pipeline runs
+            placeholders = {ticker: st.empty() for ticker in tickers}
+            for ticker, placeholder in placeholders.items():
+                placeholder.info(f"Running backtest for {ticker}...")
 
-                if stock_prices.empty:
-                    st.warning(f"No data found for {ticker} in the specified date range.")
-                    continue
-                
-                stock_returns = stock_prices.pct_change()
+            # Sorted so the same set of tickers hits the same cache entry whatever the input order
+            try:
+                computed = _compute_all(tuple(sorted(tickers)), start_date, end_date, lookback)
+            except _NoDataError as e:
+                computed = e.results
 
-                # stock_prices = stock_data[ticker]
-                # stock_returns = returns[ticker]
+            for ticker, placeholder in placeholders.items():
+                data = computed[ticker]
+                if data is None:
+                    placeholder.warning(f"No data found for {ticker} in the specified date range.")
+                    continue
 
-                results = {}
-                
-                # Calculate years
-                difference = end_date - start_date
-                years = difference.total_seconds() / (365.25 * 24 * 3600)
-                
-                # CAGR Calculation
-                start_price = stock_prices.iloc[0]
-                end_price = stock_prices.iloc[-1]
-                cagr = ((end_price / start_price) ** (1 / years)) - 1
-                # Annualized Volatility
-                annual_volatility = np.std(stock_returns) * np.sqrt(252)
-            
-                # Drawdown Calculation
-                rolling_max = stock_prices.cummax()
-                drawdown = (stock_prices / rolling_max) - 1
-
-                # Maximum Drawdown and Recovery Period Calculation
-                max_drawdown = drawdown.min()
-                max_drawdown_start = drawdown.idxmin()  # Date of max drawdown
-
-                # Identify the recovery date
-                recovery_date = None
-                for date, price in stock_prices[max_drawdown_start:].items():
-                    if price >= rolling_max[max_drawdown_start]:
-                        recovery_date = date
-                        break
-                # Calculate recovery period
-                recovery_period = None
-                if recovery_date:
-                    recovery_period = (recovery_date - max_drawdown_start).days
-
-                # Underwater Duration Calculation
-                underwater_x = []
-                underwater_y = []
-                cumulative_duration = 0
-                for date, value in drawdown.items():
-                    if value < 0:
-                        cumulative_duration += 1 / 30
-                    else:
-                        cumulative_duration = 0
-                    underwater_x.append(date)
-                    underwater_y.append(cumulative_duration)
-
-                # Calendar Year Returns
-                annual_returns = stock_returns.resample('YE').sum()
-                monthly_returns = stock_returns.resample('ME').sum()
-
-                results[ticker] = {
-                    'Compound Annual Growth Rate (CAGR)': cagr,
-                    'Annual Volatility':  annual_volatility,
-                    'Max Drawdown': max_drawdown,
-                    'Recovery Period (Months)': recovery_period / 30.22
-                    }
+                with placeholder.container():
+                    results = {}
+                    results[ticker] = {
+                        'Compound Annual Growth Rate (CAGR)': data['cagr'],
+                        'Annual Volatility':  data['vol'] if not np.isnan(data['vol']) else "n/a",  # Needs at least two returns
+                        'Max Drawdown': data['mdd'],
+                        'Recovery Period (Months)': data['recovery'] / 30.22 if data['recovery'] is not None else "Not recovered"
+                        }
                 
-                if results:
-                    st.subheader(f"{ticker} Analysis between {start_date.strftime('%b')}-{start_date.year} to {end_date.strftime('%b')}-{end_date.year}")
-                    for ticker, metrics in results.items():
-                        for metric, value in metrics.items():
-                            if isinstance(value, float):
-                                if 'Months' in metric:
-                                    st.write(f"{metric}: {value:.2f} Months")
+                    if results:
+                        st.subheader(f"{ticker} Analysis between {start_date.strftime('%b')}-{start_date.year} to {end_date.strftime('%b')}-{end_date.year}")
+                        for ticker, metrics in results.items():
+                            for metric, value in metrics.items():
+                                if isinstance(value, float):
+                                    if 'Months' in metric:
+                                        st.write(f"{metric}: {value:.2f} Months")
+                                    else:
+                                        st.write(f"{metric}: {value * 100:.2f}%")
                                 else:
-                                    st.write(f"{metric}: {value * 100:.2f}%")
-                            else:
-                                st.write(f"{metric}: {value}")
-                plot_price_chart(ticker, stock_prices)
-                plot_annual_returns(ticker, annual_returns)
-                plot_drawdown_and_underwater(ticker, drawdown, underwater_x, underwater_y)
-                plot_seasonality_and_table(ticker, monthly_returns)
+                                    st.write(f"{metric}: {value}")
+                    plot_price_chart(ticker, data['prices'])
+                    plot_annual_returns(ticker, data['years'], data['annual'])
+                    plot_drawdown_and_underwater(ticker, data['drawdown'], data['drawdown'].index, data['underwater_y'])
+                    plot_seasonality_and_table(ticker, data['monthly_avg'])
 
         except Exception as e:
             st.error(f"An error occurred: {e}")